@@ -1,6 +1,9 @@
 import argparse
 import csv
+import os
+import shlex
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import logging
 
@@ -9,14 +12,23 @@ from .core import (
     AudioFile,
     AudioProcessor,
     FFMPEG,
+    FFMPEG_THREADS_MAX,
+    threads_per_invocation,
 )
-from .utils import PresetManager, AUDIO_EXTS, validate_settings
-from .helpers import ensure_eula_accepted
+from .utils import PresetManager, AUDIO_EXTS, prefetch_files, validate_settings
+from .helpers import ensure_eula_accepted, load_doc
 
 APP_NAME = "Music Forge Pro Max"
 APP_VERSION = "1.0.0"
 
 
+def _thread_count(value: str) -> int:
+    n = int(value)
+    if not 1 <= n <= FFMPEG_THREADS_MAX:
+        raise argparse.ArgumentTypeError(f"must be between 1 and {FFMPEG_THREADS_MAX}")
+    return n
+
+
 def build_cli_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
         prog="musicforge",
@@ -37,7 +49,7 @@ def build_cli_parser() -> argparse.ArgumentParser:
     p.add_argument(
         "--quality",
         "-q",
-        help="Quality (mp3: V0..V4, aac/m4a: e.g., 256k, ogg: 0..10)",
+        help="Quality (mp3: V0..V4, aac/m4a: e.g., 256k, ogg: 0..10, flac: compression 0..12)",
     )
     p.add_argument("--bit-depth", type=int, default=None, help="WAV bit depth: 16/24/32")
     p.add_argument("--sr", "--sample-rate", type=int, default=None, help="Sample rate Hz")
@@ -68,7 +80,31 @@ def build_cli_parser() -> argparse.ArgumentParser:
         nargs="*",
         help="Metadata k=v pairs, e.g., artist='Name' title='{stem}'",
     )
-    p.add_argument("--parallel", type=int, default=1, help="Parallel workers")
+    p.add_argument(
+        "--parallel",
+        "--max-workers",
+        dest="parallel",
+        type=int,
+        default=None,
+        help="Parallel FFmpeg workers (0 = one per CPU core; default: the preset's setting, else 1)",
+    )
+    p.add_argument(
+        "--ffmpeg-threads",
+        type=_thread_count,
+        default=None,
+        help="Threads per FFmpeg process (default: $MUSICFORGE_FFMPEG_THREADS, else the cores split between workers)",
+    )
+    p.add_argument(
+        "--group-size",
+        type=int,
+        default=1,
+        help="Convert up to N files per FFmpeg process (saves process start-up on many short files)",
+    )
+    p.add_argument(
+        "--emit-parallel-script",
+        metavar="PATH",
+        help="Write the FFmpeg commands to PATH, one per line, for GNU parallel instead of converting",
+    )
     p.add_argument(
         "--watch", help="Watch a folder and auto-process new files (polling)"
     )
@@ -136,6 +172,26 @@ def collect_audio_paths(inp: str) -> list[str]:
     return [str(f) for f in p.rglob("*") if f.suffix.lower() in AUDIO_EXTS]
 
 
+def emit_parallel_script(
+    path: str,
+    proc: AudioProcessor,
+    s: "ProcessingSettings",
+    batches: list[list[tuple[int, Path, str, Path, AudioFile]]],
+    threads: int | None = None,
+) -> int:
+    # GNU parallel runs one job per core, so unless --ffmpeg-threads or
+    # MUSICFORGE_FFMPEG_THREADS says otherwise each FFmpeg gets one thread.
+    per_job = threads_per_invocation(os.cpu_count() or 1, threads)
+    with open(path, "w", encoding="utf-8") as f:
+        for batch in batches:
+            cmd = proc.script_command([(job[4], job[3]) for job in batch], s, per_job)
+            f.write(shlex.join(cmd) + "\n")
+    print(
+        f"Wrote {len(batches)} commands to {path}. Run them with: parallel --eta -j$(nproc) :::: {path}"
+    )
+    return 0
+
+
 def cli_main(argv: list[str]) -> int:
     parser = build_cli_parser()
     args = parser.parse_args(argv)
@@ -146,17 +202,18 @@ def cli_main(argv: list[str]) -> int:
 
     if args.manual:
         try:
-            with open("docs/USER_MANUAL.md", "r", encoding="utf-8") as f:
-                print(f.read())
+            print(load_doc("USER_MANUAL.md"))
         except FileNotFoundError:
             print("USER_MANUAL.md not found in docs/", file=sys.stderr)
         return 0
     if args.power_guide:
+        from .cookbook import render_cookbook  # only needed here
+
         try:
-            with open("docs/POWER_GUIDE.md", "r", encoding="utf-8") as f:
-                print(f.read())
+            print(load_doc("POWER_GUIDE.md"))
         except FileNotFoundError:
             print("POWER_GUIDE.md not found in docs/", file=sys.stderr)
+        print(render_cookbook(), end="")
         return 0
 
     if args.preset_list:
@@ -221,8 +278,8 @@ def cli_main(argv: list[str]) -> int:
         s.overwrite_existing = True
     if args.template:
         s.filename_template = args.template
-    if args.parallel:
-        s.parallelism = max(1, args.parallel)
+    if args.parallel is not None:
+        s.parallelism = max(1, args.parallel or os.cpu_count() or 1)
 
     try:
         _validate_cli_settings(s)
@@ -250,6 +307,9 @@ def cli_main(argv: list[str]) -> int:
     fail_count = 0
     rows = []
 
+    # Plan every output first so grouped runs know all their destinations.
+    planned = []
+    taken: set[Path] = set()
     for idx, fp in enumerate(files, start=1):
         src = Path(fp)
         ext = proc.format_to_extension(s.output_format)
@@ -263,31 +323,114 @@ def cli_main(argv: list[str]) -> int:
         fname = s.filename_template.format(**placeholders)
         dst = outdir / fname
 
-        if dst.exists() and not s.overwrite_existing:
+        if (dst.exists() and not s.overwrite_existing) or dst in taken:
             base = dst.stem
             ext_suf = dst.suffix
             counter = 1
-            while dst.exists():
+            while dst.exists() or dst in taken:
                 dst = outdir / f"{base}_{counter:03d}{ext_suf}"
                 counter += 1
+        taken.add(dst)
 
         af = AudioFile(path=str(src), name=src.name, size=int(src.stat().st_size), format=src.suffix.lstrip(".").lower())
+        planned.append((idx, src, fname, dst, af))
+
+    group_size = max(1, args.group_size)
+    if group_size > 1:
+        groups = proc.split_into_groups(
+            [(job[4], job[3]) for job in planned], max_inputs=group_size
+        )
+        remaining = iter(planned)
+        batches = [[next(remaining) for _ in group] for group in groups]
+    else:
+        batches = [[job] for job in planned]
+
+    if args.emit_parallel_script:
+        return emit_parallel_script(
+            args.emit_parallel_script, proc, s, batches, args.ffmpeg_threads
+        )
+
+    workers = min(s.parallelism, len(batches))
+    # Split the cores between concurrent FFmpeg processes instead of letting
+    # each one start a thread per core.
+    proc.threads_per_job = threads_per_invocation(workers, args.ffmpeg_threads)
+
+    def run_batch(k):
+        batch = batches[k]
+        # Batch k + workers is the next one a free worker will pick up; let
+        # the OS read its inputs ahead while this batch converts.
+        if k + workers < len(batches):
+            prefetch_files(str(job[1]) for job in batches[k + workers])
+        first_idx, first_src, first_fname = batch[0][0], batch[0][1], batch[0][2]
+        label = (
+            f"{first_src.name} -> {first_fname}"
+            if len(batch) == 1
+            else f"{len(batch)} files"
+        )
 
         def cb(kind: str, value: float) -> None:
             if kind == "progress":
                 pct = f"{value:5.1f}%"
-                print(f"[{idx}/{total}] {src.name} -> {fname} {pct}", end="\r")
+                print(f"[{first_idx}/{total}] {label} {pct}", end="\r")
+
+        # Interleaved progress lines from several workers would be unreadable.
+        progress = cb if workers == 1 else None
+        if len(batch) == 1:
+            return [
+                proc.process_file(
+                    batch[0][4], s, batch[0][3], progress_callback=progress
+                )
+            ]
+        return proc.process_group(
+            [(job[4], job[3]) for job in batch], s, progress_callback=progress
+        )
 
-        ok, err = proc.process_file(af, s, dst, progress_callback=cb)
+    if workers > 1:
+        # Start the biggest batches first so one long file queued last does
+        # not keep a single worker busy while the others sit idle.
+        batches.sort(key=lambda batch: sum(job[4].size for job in batch), reverse=True)
+        pool = ThreadPoolExecutor(max_workers=workers)
+        futures = {pool.submit(run_batch, k): batch for k, batch in enumerate(batches)}
+        finished = ((futures[f], f.result()) for f in as_completed(futures))
+    else:
+        pool = None
+        finished = ((batch, run_batch(k)) for k, batch in enumerate(batches))
 
-        if ok:
-            ok_count += 1
-            rows.append([src.name, af.format.upper(), f"{af.size/(1024*1024):.1f}", f"{af.duration:.1f}" if af.duration else "", "COMPLETED", "", str(dst)])
-            print(f"\n[{idx}/{total}] {src.name} -> {fname}  DONE")
-        else:
-            fail_count += 1
-            rows.append([src.name, af.format.upper(), f"{af.size/(1024*1024):.1f}", f"{af.duration:.1f}" if af.duration else "", "FAILED", err or "", str(dst)])
-            print(f"\n[{idx}/{total}] {src.name} -> {fname}  ERROR: {err}")
+    try:
+        for batch, results in finished:
+            for (idx, src, fname, dst, af), (ok, err) in zip(batch, results):
+                if ok:
+                    ok_count += 1
+                    rows.append(
+                        [
+                            src.name,
+                            af.format.upper(),
+                            f"{af.size/(1024*1024):.1f}",
+                            f"{af.duration:.1f}" if af.duration else "",
+                            "COMPLETED",
+                            "",
+                            str(dst),
+                        ]
+                    )
+                    print(f"\n[{idx}/{total}] {src.name} -> {fname}  DONE")
+                else:
+                    fail_count += 1
+                    rows.append(
+                        [
+                            src.name,
+                            af.format.upper(),
+                            f"{af.size/(1024*1024):.1f}",
+                            f"{af.duration:.1f}" if af.duration else "",
+                            "FAILED",
+                            err or "",
+                            str(dst),
+                        ]
+                    )
+                    print(f"\n[{idx}/{total}] {src.name} -> {fname}  ERROR: {err}")
+    finally:
+        # A failing batch must not leave queued batches launching FFmpeg.
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
     if args.report:
         try:
@@ -300,4 +443,4 @@ def cli_main(argv: list[str]) -> int:
             print(f"Report error: {e}", file=sys.stderr)
 
     print(f"\nDone. OK={ok_count} FAILED={fail_count}")
-    return 0 if fail_count == 0 else 1
\ No newline at end of file
+    return 0 if fail_count == 0 else 1
@@ -0,0 +1,67 @@
+from functools import cache, lru_cache
+from typing import Iterator, Tuple
+
+from .core import GROUP_MAX_INPUTS
+
+COOKBOOK_TITLE = "FFmpeg Cookbook — {n} Example Lines"
+COOKBOOK_LINES = 1200
+_CMD_TMPL = '{i:04d}: ffmpeg -i in{i}.wav -af "{af}" -c:a pcm_s16le out{i}.wav'
+
+# Example i (1-based) uses HIGHPASS[i % 10], LOWPASS[i % 7] and DYNAUDNORM[i % 3].
+HIGHPASS = tuple(range(80, 180, 10))
+LOWPASS = tuple(range(16000, 12500, -500))
+DYNAUDNORM = (1.0, 1.5, 2.0)
+
+
+def cookbook_params(
+    start: int = 1, stop: int = COOKBOOK_LINES + 1
+) -> Iterator[Tuple[int, int, int, float]]:
+    """Yields (index, highpass, lowpass, dynaudnorm) for examples start..stop-1."""
+    for i in range(start, stop):
+        yield i, HIGHPASS[i % 10], LOWPASS[i % 7], DYNAUDNORM[i % 3]
+
+
+# The grid repeats every 210 examples, so each -af string is formatted once.
+@lru_cache(maxsize=256)
+def _filter(hp: int, lp: int, dn: float) -> str:
+    return f"highpass=f={hp},lowpass=f={lp},dynaudnorm=f={dn}:p=0.9"
+
+
+def cookbook_lines(n: int = COOKBOOK_LINES) -> Iterator[str]:
+    """Yields the numbered cookbook example commands, one per line."""
+    for i, hp, lp, dn in cookbook_params(1, n + 1):
+        yield _CMD_TMPL.format(i=i, af=_filter(hp, lp, dn))
+
+
+def grouped_commands(
+    n: int = COOKBOOK_LINES, max_inputs: int = GROUP_MAX_INPUTS
+) -> Iterator[str]:
+    """
+    Yields the same n examples as cookbook_lines, but with every example
+    sharing a filter chain converted by one FFmpeg process (at most
+    max_inputs files each), so FFmpeg starts once per group instead of
+    once per file.
+    """
+    groups: dict = {}
+    for i, *chain in cookbook_params(1, n + 1):
+        groups.setdefault(tuple(chain), []).append(i)
+    for chain, indices in groups.items():
+        af = _filter(*chain)
+        for start in range(0, len(indices), max_inputs):
+            batch = indices[start : start + max_inputs]
+            inputs = " ".join(f"-i in{i}.wav" for i in batch)
+            outputs = " ".join(
+                f'-map {k}:a:0 -af "{af}" -c:a pcm_s16le out{i}.wav'
+                for k, i in enumerate(batch)
+            )
+            yield f"ffmpeg -hide_banner -loglevel error -nostdin {inputs} {outputs}"
+
+
+@cache
+def render_cookbook(n: int = COOKBOOK_LINES, grouped: bool = False) -> str:
+    """
+    Returns the cookbook text: the title line followed by the n examples.
+    Built on first use and cached, like the docs loaded by helpers.load_doc.
+    """
+    lines = grouped_commands(n) if grouped else cookbook_lines(n)
+    return "\n".join([COOKBOOK_TITLE.format(n=n), *lines]) + "\n"
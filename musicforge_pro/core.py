@@ -1,17 +1,19 @@
 import os
 import subprocess
+import contextlib
+import copy
 import json
 import logging
 import shlex
 import threading
 import time
 import signal
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 from enum import Enum
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-from .utils import run_ffmpeg, validate_settings
+from .utils import probe_duration, run_ffmpeg, validate_settings
 
 
 class ProcessingStatus(Enum):
@@ -89,11 +91,22 @@ class ProcessingSettings:
 
 class FFmpegManager:
     def __init__(self) -> None:
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Looks up ffmpeg/ffprobe again, e.g. after the user installed them."""
         self.ffmpeg_path = self._find_executable("ffmpeg")
         self.ffprobe_path = self._find_executable("ffprobe")
         self.libfdk_aac_available = self._check_libfdk_aac()
 
     def _find_executable(self, name: str) -> Optional[str]:
+        # MUSICFORGE_FFMPEG / MUSICFORGE_FFPROBE pin a specific binary, e.g. a
+        # trimmed static build, ahead of whatever PATH would find.
+        override = os.environ.get(f"MUSICFORGE_{name.upper()}")
+        if override:
+            candidate = Path(override).expanduser()
+            if candidate.is_file() and os.access(candidate, os.X_OK):
+                return str(candidate.resolve())
         for p in os.environ.get("PATH", "").split(os.pathsep):
             candidate = Path(p) / (name + (".exe" if os.name == "nt" else ""))
             if candidate.exists() and os.access(candidate, os.X_OK):
@@ -180,10 +193,48 @@ FFMPEG = FFmpegManager()
 
 ProgressCallback = Callable[[str, float], None]
 
+# Limits for one grouped FFmpeg invocation (see AudioProcessor.process_group):
+# a failure re-runs the whole group file by file, and the command line has to
+# stay well below the OS argument limit.
+GROUP_MAX_INPUTS = 32
+GROUP_MAX_ARG_BYTES = 96 * 1024
+
+FFMPEG_THREADS_MAX = 64
+
+
+def threads_per_invocation(workers: int, requested: Optional[int] = None) -> int:
+    """
+    Returns the -threads value for each of `workers` concurrent FFmpeg runs.
+    An explicit `requested` count wins, then MUSICFORGE_FFMPEG_THREADS (if it
+    is a number in 1..FFMPEG_THREADS_MAX); otherwise the CPU cores are split
+    evenly. 0 leaves FFmpeg's own default, which suits a single worker.
+    """
+    if requested is None:
+        env = os.environ.get("MUSICFORGE_FFMPEG_THREADS", "")
+        if env.isdigit() and 1 <= int(env) <= FFMPEG_THREADS_MAX:
+            requested = int(env)
+    if requested:
+        return requested
+    if workers <= 1:
+        return 0
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def _last_line(text: str) -> str:
+    return (text.splitlines()[-1] if text else "").strip()
+
+
+def _log_command(cmd: List[str]) -> None:
+    # Quoting a long grouped argv is only worth doing when it will be shown.
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("FFmpeg command: %s", shlex.join(cmd))
+
 
 class AudioProcessor:
     def __init__(self, ff: FFmpegManager) -> None:
         self.ff = ff
+        # FFmpeg -threads per job; 0 leaves the choice to FFmpeg.
+        self.threads_per_job = 0
 
     def format_to_extension(self, fmt: str) -> str:
         return "m4a" if fmt.lower() in {"aac", "m4a"} else fmt.lower()
@@ -221,6 +272,9 @@ class AudioProcessor:
                 ),
             ]
         if fmt == "flac":
+            # Quality 0..12 selects the compression level; 0 encodes fastest.
+            if s.quality.isdigit() and int(s.quality) <= 12:
+                return ["-c:a", "flac", "-compression_level", s.quality]
             return ["-c:a", "flac"]
         if fmt in {"aac", "m4a"}:
             br = s.quality if s.quality.endswith("k") else "256k"
@@ -257,8 +311,11 @@ class AudioProcessor:
             self.ff.ffmpeg_path,
             "-v",
             "error",
+            "-nostdin",
             "-i",
             af.path,
+            "-map",
+            "0:a:0",
             "-af",
             f"loudnorm=I={s.target_i}:TP={s.target_tp}:LRA={s.target_lra}:print_format=json",
             "-f",
@@ -295,6 +352,7 @@ class AudioProcessor:
         output_path: Path,
         resolved_md: Dict[str, str],
         measured: Optional[Dict[str, float]] = None,
+        progress: bool = True,
     ) -> List[str]:
         assert self.ff.ffmpeg_path, "FFmpeg path not set"
         cmd = [
@@ -303,21 +361,125 @@ class AudioProcessor:
             "-v",
             "error",
             "-hide_banner",
+            *self._global_args(),
             "-i",
             af.path,
+            "-map",
+            "0:a:0",
         ]
+        cmd.extend(self._output_args(af, s, resolved_md, measured))
+        if progress:
+            cmd.extend(["-progress", "pipe:1"])
+        cmd.extend(["-nostats", "-v", "error"])
+        cmd.extend(self._container_args(s))
+        cmd.append(str(output_path))
+        return cmd
+
+    def build_group_command(
+        self,
+        items: Sequence[
+            Tuple[AudioFile, Path, Dict[str, str], Optional[Dict[str, float]]]
+        ],
+        s: ProcessingSettings,
+        progress: bool = True,
+    ) -> List[str]:
+        """
+        Builds one FFmpeg command converting several files, given as
+        (file, output path, resolved metadata, measured loudness) tuples.
+        Each output maps the audio and metadata of its own input and gets the
+        same options build_command would use for that file.
+        """
+        assert self.ff.ffmpeg_path, "FFmpeg path not set"
+        cmd = [
+            self.ff.ffmpeg_path,
+            "-y" if s.overwrite_existing else "-n",
+            "-v",
+            "error",
+            "-hide_banner",
+            *self._global_args(),
+        ]
+        if progress:
+            cmd.extend(["-progress", "pipe:1"])
+        cmd.append("-nostats")
+        for af, _, _, _ in items:
+            cmd.extend(["-i", af.path])
+        # Settings-only options are built once and shared by every output.
+        shared = self._shared_output_args(s)
+        container = self._container_args(s)
+        for i, (af, output_path, resolved_md, measured) in enumerate(items):
+            cmd.extend(["-map", f"{i}:a:0", "-map_metadata", str(i)])
+            cmd.extend(self._output_args(af, s, resolved_md, measured, shared))
+            cmd.extend(container)
+            cmd.append(str(output_path))
+        return cmd
+
+    def _output_args(
+        self,
+        af: AudioFile,
+        s: ProcessingSettings,
+        resolved_md: Dict[str, str],
+        measured: Optional[Dict[str, float]],
+        shared: Optional[Tuple[List[str], List[str]]] = None,
+    ) -> List[str]:
+        head, tail = shared or self._shared_output_args(s)
+        return [
+            *head,
+            *self.build_filters(af, s, measured),
+            *s.metadata.to_args(resolved_md),
+            *tail,
+        ]
+
+    def _shared_output_args(self, s: ProcessingSettings) -> Tuple[List[str], List[str]]:
+        """Returns the output options that depend only on `s`: (before filters, after metadata)."""
+        # Only the audio is converted; cover art, subtitles and data streams
+        # are not decoded or carried over.
+        head: List[str] = ["-vn", "-sn", "-dn"]
         if s.sample_rate:
-            cmd.extend(["-ar", str(s.sample_rate)])
+            head.extend(["-ar", str(s.sample_rate)])
         if s.channels:
-            cmd.extend(["-ac", str(s.channels)])
-        cmd.extend(self.build_filters(af, s, measured))
-        cmd.extend(s.metadata.to_args(resolved_md))
-        cmd.extend(self.build_encoding_args(s))
-        cmd.extend(["-progress", "pipe:1", "-nostats", "-v", "error"])
+            head.extend(["-ac", str(s.channels)])
+        tail = self.build_encoding_args(s)
+        if self.threads_per_job:
+            tail.extend(["-threads", str(self.threads_per_job)])
+        return head, tail
+
+    def _global_args(self) -> List[str]:
+        # -nostdin keeps FFmpeg from reading the terminal, which matters when
+        # several run at once under the CLI.
+        args = ["-nostdin"]
+        if self.threads_per_job:
+            args.extend(["-filter_threads", str(self.threads_per_job)])
+        return args
+
+    def _container_args(self, s: ProcessingSettings) -> List[str]:
         if self.format_to_extension(s.output_format) in {"m4a", "aac"}:
-            cmd.extend(["-f", "mp4"])
-        cmd.append(str(output_path))
-        return cmd
+            return ["-f", "mp4"]
+        return []
+
+    def _prepare(
+        self, af: AudioFile, s: ProcessingSettings
+    ) -> Tuple[Dict[str, str], Optional[Dict[str, float]]]:
+        """Probes the duration if needed and returns (resolved metadata, measured loudness)."""
+        if not af.duration or af.duration <= 0:
+            af.duration = probe_duration(af.path)
+
+        resolved = self._resolve_metadata(af, s)
+        measured = (
+            self.measure_loudness(af, s)
+            if s.normalize_loudness and s.normalize_mode == "two-pass"
+            else None
+        )
+        af.measured_loudness = measured
+        return resolved, measured
+
+    def _resolve_metadata(self, af: AudioFile, s: ProcessingSettings) -> Dict[str, str]:
+        return {
+            "stem": Path(af.path).stem,
+            "ext": self.format_to_extension(s.output_format),
+            "name": af.name,
+            "size_mb": f"{af.size/(1024*1024):.1f}",
+            "duration_s": f"{af.duration:.1f}" if af.duration else "",
+        }
 
     def process_file(
         self,
@@ -329,25 +491,96 @@ class AudioProcessor:
     ) -> Tuple[bool, Optional[str]]:
         try:
             validate_settings(s)
+            resolved, measured = self._prepare(af, s)
+            return self._convert(
+                af, s, output_path, resolved, measured, progress_callback, stop_event
+            )
+        except Exception as e:
+            return False, str(e)
 
+    def _convert(
+        self,
+        af: AudioFile,
+        s: ProcessingSettings,
+        output_path: Path,
+        resolved: Dict[str, str],
+        measured: Optional[Dict[str, float]],
+        progress_callback: Optional[ProgressCallback] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> Tuple[bool, Optional[str]]:
+        """Runs one conversion whose metadata and loudness are already prepared."""
+        cmd = self.build_command(af, s, output_path, resolved, measured)
+        _log_command(cmd)
+
+        def progress_wrapper(percent: Optional[float] = None, **kwargs):
+            if progress_callback and percent is not None:
+                progress_callback("progress", percent)
+
+        rc, _, stderr = run_ffmpeg(
+            cmd,
+            on_progress=progress_wrapper,
+            duration_sec=af.duration,
+            stop_event=stop_event,
+        )
+        if rc == 0:
+            return True, None
+        return False, _last_line(stderr) or f"ffmpeg exited with {rc}"
+
+    def script_command(
+        self,
+        jobs: Sequence[Tuple[AudioFile, Path]],
+        s: ProcessingSettings,
+        threads_per_job: int = 0,
+    ) -> List[str]:
+        """
+        Returns a standalone FFmpeg command for the given (file, output path)
+        jobs, to be run outside the app: a single-input command for one job,
+        a grouped one for several. Neither the files nor this processor are
+        changed, and no loudness is measured, so two-pass normalization
+        becomes single-pass. There is no -progress pipe to read.
+        """
+        builder = copy.copy(self)
+        builder.threads_per_job = threads_per_job
+        items = []
+        for af, out in jobs:
             if not af.duration or af.duration <= 0:
-                af.duration = FFMPEG.probe_duration(af.path)
-
-            resolved = {
-                "stem": Path(af.path).stem,
-                "ext": self.format_to_extension(s.output_format),
-                "name": af.name,
-                "size_mb": f"{af.size/(1024*1024):.1f}",
-                "duration_s": f"{af.duration:.1f}" if af.duration else "",
-            }
-            measured = (
-                self.measure_loudness(af, s)
-                if s.normalize_loudness and s.normalize_mode == "two-pass"
-                else None
-            )
-            af.measured_loudness = measured
-            cmd = self.build_command(af, s, output_path, resolved, measured)
-            logging.debug(f"FFmpeg command: {' '.join(cmd)}")
+                af = replace(af, duration=probe_duration(af.path))
+            items.append((af, out, self._resolve_metadata(af, s), None))
+        if len(items) == 1:
+            af, out, resolved, _ = items[0]
+            return builder.build_command(af, s, out, resolved, progress=False)
+        return builder.build_group_command(items, s, progress=False)
+
+    def process_group(
+        self,
+        jobs: Sequence[Tuple[AudioFile, Path]],
+        s: ProcessingSettings,
+        progress_callback: Optional[ProgressCallback] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Converts several (file, output path) jobs with one FFmpeg process,
+        saving a process start per file. If that process fails, the jobs are
+        retried one by one so each gets its own result.
+        Progress is reported for the group as a whole.
+        """
+        if len(jobs) == 1:
+            af, output_path = jobs[0]
+            return [
+                self.process_file(af, s, output_path, progress_callback, stop_event)
+            ]
+        try:
+            validate_settings(s)
+            items = [(af, out, *self._prepare(af, s)) for af, out in jobs]
+        except Exception as e:
+            return [(False, str(e))] * len(jobs)
+
+        # Outputs this run creates are removed again if it fails, so the
+        # per-file retries are not refused by -n.
+        created = [out for _, out, _, _ in items if not out.exists()]
+        try:
+            cmd = self.build_group_command(items, s)
+            _log_command(cmd)
 
             def progress_wrapper(percent: Optional[float] = None, **kwargs):
                 if progress_callback and percent is not None:
@@ -356,15 +589,54 @@ class AudioProcessor:
             rc, _, stderr = run_ffmpeg(
                 cmd,
                 on_progress=progress_wrapper,
-                duration_sec=af.duration,
+                duration_sec=max(af.duration for af, _ in jobs),
                 stop_event=stop_event,
             )
-
             if rc == 0:
-                return True, None
-            else:
-                last_line = (stderr.splitlines()[-1] if stderr else "").strip()
-                return False, last_line or f"ffmpeg exited with {rc}"
-
+                return [(True, None)] * len(jobs)
+            group_error = _last_line(stderr) or f"ffmpeg exited with {rc}"
         except Exception as e:
-            return False, str(e)
\ No newline at end of file
+            group_error = str(e)
+        logging.warning(
+            f"Grouped FFmpeg run failed, retrying file by file: {group_error}"
+        )
+        for out in created:
+            with contextlib.suppress(OSError):
+                out.unlink()
+        if stop_event is not None and stop_event.is_set():
+            return [(False, "Stopped")] * len(jobs)
+
+        results = []
+        for af, out, resolved, measured in items:
+            try:
+                ok, err = self._convert(
+                    af, s, out, resolved, measured, progress_callback, stop_event
+                )
+            except Exception as e:
+                ok, err = False, str(e)
+            results.append((ok, None if ok else f"{err} (grouped run: {group_error})"))
+        return results
+
+    @staticmethod
+    def split_into_groups(
+        jobs: Sequence[Tuple[AudioFile, Path]],
+        max_inputs: int = GROUP_MAX_INPUTS,
+        max_arg_bytes: int = GROUP_MAX_ARG_BYTES,
+    ) -> List[List[Tuple[AudioFile, Path]]]:
+        """Splits jobs into runs for process_group, bounded by count and path bytes."""
+        groups: List[List[Tuple[AudioFile, Path]]] = []
+        current: List[Tuple[AudioFile, Path]] = []
+        size = 0
+        for af, out in jobs:
+            # Paths dominate the command length; options add a few hundred bytes.
+            job_bytes = len(af.path) + len(str(out)) + 512
+            if current and (
+                len(current) >= max_inputs or size + job_bytes > max_arg_bytes
+            ):
+                groups.append(current)
+                current, size = [], 0
+            current.append((af, out))
+            size += job_bytes
+        if current:
+            groups.append(current)
+        return groups
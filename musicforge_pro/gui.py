@@ -3,7 +3,7 @@ import csv
 import queue
 import threading
 import sys
-import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Tuple, Any, Dict, Iterable
@@ -20,19 +20,31 @@ if tk_available:
     from .core import (
         AudioProcessor,
         FFMPEG,
+        threads_per_invocation,
         AudioFile,
         ProcessingSettings,
         ProcessingStatus,
         MetadataTemplate,
     )
-    from .utils import PresetManager, SessionStore, FolderWatcher, AUDIO_EXTS, LOG_FILE
+    from .utils import (
+        PresetManager,
+        SessionStore,
+        FolderWatcher,
+        StopEvent,
+        AUDIO_EXTS,
+        LOG_FILE,
+    )
+    from .cookbook import render_cookbook
     from .helpers import (
         open_url,
         ensure_ffmpeg_present_or_prompt,
+        refresh_ffmpeg_detection,
         guided_ffmpeg_install,
         _get_embedded_eula_text,
+        load_doc,
+        ffprobe_durations_bulk,
         DOWNLOADS_LANDING_URL,
-        DOWNLOAD_LINKS,
+        _download_links,
         open_ffmpeg_download_page,
     )
 
@@ -44,17 +56,14 @@ if tk_available:
             self.minsize(1200, 800)
             self._log_lock = threading.Lock()
 
-            self.user_manual = self._load_doc("docs/USER_MANUAL.md")
-            self.power_guide = self._load_doc("docs/POWER_GUIDE.md")
-            self.cookbook = self._load_doc("docs/COOKBOOK.txt")
-
             self.proc = AudioProcessor(FFMPEG)
             self.preset_mgr = PresetManager()
             self.session = SessionStore()
             self.settings = ProcessingSettings()
             self.audio_files: List[AudioFile] = []
+            self._queued_paths: set[str] = set()
             self._log_queue: "queue.Queue[Tuple[str,str]]" = queue.Queue()
-            self._stop_event = threading.Event()
+            self._stop_event = StopEvent()
             self._threads: List[threading.Thread] = []
             self._watcher: Optional[FolderWatcher] = None
 
@@ -89,13 +98,15 @@ if tk_available:
             self._check_ffmpeg()
             self.after(50, self._drain_log_queue)
 
-        def _load_doc(self, path: str) -> str:
+        def _load_doc(self, name: str) -> str:
+            """Read a documentation file on demand; the text is cached after the first read."""
             try:
-                with open(path, "r", encoding="utf-8") as f:
-                    return f.read()
+                return load_doc(name)
             except FileNotFoundError:
-                messagebox.showwarning("Docs Missing", f"Could not load documentation file: {path}")
-                return f"{path} not found."
+                messagebox.showwarning(
+                    "Docs Missing", f"Could not load documentation file: docs/{name}"
+                )
+                return f"docs/{name} not found."
 
         def _build_menu(self) -> None:
             menubar = tk.Menu(self)
@@ -314,12 +325,24 @@ if tk_available:
         def _enqueue_files(self, paths: Iterable[str]) -> None:
             """Add a list of file paths to the processing queue."""
             added = 0
+            # Skip files already queued (also via another spelling or a symlink),
+            # so they are neither probed nor converted twice.
+            fresh = {}
             for p in paths:
                 p = str(Path(p))
-                if not Path(p).exists(): continue
+                key = os.path.normcase(os.path.realpath(p))
+                if (
+                    key not in self._queued_paths
+                    and key not in fresh
+                    and Path(p).exists()
+                ):
+                    fresh[key] = p
+            durations = ffprobe_durations_bulk(list(fresh.values()))
+            for key, p in fresh.items():
+                self._queued_paths.add(key)
                 st = os.stat(p)
                 af = AudioFile(path=p, name=Path(p).name, size=int(st.st_size), format=(Path(p).suffix.lstrip(".") or "").lower())
-                af.duration = FFMPEG.probe_duration(p)
+                af.duration = durations[p]
                 self.audio_files.append(af)
                 self._add_tree_item(af)
                 added += 1
@@ -340,6 +363,7 @@ if tk_available:
         def _clear_queue(self) -> None:
             """Clear all files from the queue and the Treeview."""
             self.audio_files.clear()
+            self._queued_paths.clear()
             self.tree.delete(*self.tree.get_children())
             self.progress["value"] = 0
 
@@ -367,40 +391,38 @@ if tk_available:
             self._log("Started processing.", "info")
 
         def _dispatcher(self) -> None:
-            """Manages the worker pool for processing audio files."""
-            work_q: "queue.Queue[AudioFile]" = queue.Queue()
-            for af in self.audio_files:
-                work_q.put(af)
-            active: List[threading.Thread] = []
-
-            def start_job():
-                if work_q.empty(): return
-                af = work_q.get()
-                af.status = ProcessingStatus.PROCESSING
-                self._update_tree_row(af)
-                thread = threading.Thread(target=self._run_one, args=(af,), daemon=True)
-                thread.start()
-                active.append(thread)
-
+            """Runs the queued files on a pool of worker threads."""
+            files = list(self.audio_files)
             max_workers = self.settings.parallelism
             if (self.settings.normalize_loudness and self.settings.normalize_mode == "two-pass"):
                 max_workers = min(max_workers, max(1, (os.cpu_count() or 4) // 2))
-
-            for _ in range(max_workers):
-                start_job()
-
-            while active:
-                for t in list(active):
-                    if not t.is_alive():
-                        active.remove(t)
-                        if not work_q.empty() and not self._stop_event.is_set():
-                            start_job()
-                self._update_overall_progress()
-                time.sleep(0.05)
+            max_workers = max(1, min(max_workers, len(files)))
+            # Split the cores between concurrent FFmpeg processes, as the CLI does.
+            self.proc.threads_per_job = threads_per_invocation(max_workers)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                pending = {pool.submit(self._start_one, af) for af in files}
+                while pending:
+                    _, pending = wait(
+                        pending, timeout=0.25, return_when=FIRST_COMPLETED
+                    )
+                    if self._stop_event.is_set():
+                        # Files that have not started yet stay queued.
+                        for f in pending:
+                            f.cancel()
+                    self._update_overall_progress()
 
             self._update_overall_progress(force_done=True)
             self._log("All processing finished.", "info")
 
+        def _start_one(self, af: AudioFile) -> None:
+            """Mark a file as processing and run it, unless a stop was requested."""
+            if self._stop_event.is_set():
+                return
+            af.status = ProcessingStatus.PROCESSING
+            self._update_tree_row(af)
+            self._run_one(af)
+
         def _run_one(self, af: AudioFile) -> None:
             """Process a single audio file."""
             try:
@@ -480,14 +502,24 @@ if tk_available:
         def _show_manual(self):
             """Show the user manual in a new window."""
             win = tk.Toplevel(self); win.title("User Manual"); win.geometry("900x700")
-            txt = tk.Text(win, wrap="word"); txt.pack(fill="both", expand=True); txt.insert("1.0", self.user_manual); txt.config(state="disabled")
+            txt = tk.Text(win, wrap="word")
+            txt.pack(fill="both", expand=True)
+            txt.insert("1.0", self._load_doc("USER_MANUAL.md"))
+            txt.config(state="disabled")
 
         def _show_power_guide(self):
             """Show the power user guide in a new window."""
             win = tk.Toplevel(self); win.title("Power Guide"); win.geometry("900x700")
             txt = tk.Text(win, wrap="word")
             txt.pack(fill="both", expand=True)
-            txt.insert("1.0", self.power_guide + "\n\n" + self.cookbook)
+            txt.insert(
+                "1.0",
+                self._load_doc("POWER_GUIDE.md")
+                + "\n\n"
+                + render_cookbook()
+                + "\nThe same examples, one FFmpeg process per filter chain:\n"
+                + render_cookbook(grouped=True),
+            )
             txt.config(state="disabled")
 
         def _show_ffmpeg_help(self):
@@ -498,12 +530,10 @@ if tk_available:
                 "You can download it from the official website: https://ffmpeg.org/download.html",
             )
         def _show_downloads(self):
+            links = "\n".join(f"{label}: {url}" for label, url in _download_links())
             messagebox.showinfo(
                 "Download Links",
-                f"Get the latest version of Music Forge Pro Max:\n\n"
-                f"Windows: {DOWNLOAD_LINKS['windows']}\n"
-                f"macOS: {DOWNLOAD_LINKS['macos']}\n"
-                f"Linux: {DOWNLOAD_LINKS['linux']}",
+                f"Get the latest version of Music Forge Pro Max:\n\n{links}",
             )
         def _show_about(self):
             from .cli import APP_NAME, APP_VERSION
@@ -515,6 +545,8 @@ if tk_available:
                 "Built with Python, Tkinter, and FFmpeg.",
             )
         def _check_ffmpeg_dialog(self):
+            refresh_ffmpeg_detection()
+            self._check_ffmpeg()
             if FFMPEG.is_available():
                 info = FFMPEG.get_version_info()
                 messagebox.showinfo(
@@ -703,6 +735,10 @@ if tk_available:
                 self.quality_combo.configure(values=[str(i) for i in range(0,11)])
                 if self.quality_var.get() not in {str(i) for i in range(0,11)}:
                     self.quality_var.set("6")
+            elif fmt == "flac":
+                self.quality_combo.configure(values=[str(i) for i in range(0, 13)])
+                if self.quality_var.get() not in {str(i) for i in range(0, 13)}:
+                    self.quality_var.set("5")
             elif fmt == "opus":
                 self.quality_combo.configure(values=["64k","96k","128k","160k","192k","256k","320k"])
                 if not str(self.quality_var.get()).endswith("k"):
@@ -752,4 +788,4 @@ def gui_main() -> int:
         return 1
     app = MusicForgeApp()
     app.mainloop()
-    return 0
\ No newline at end of file
+    return 0
@@ -13,6 +13,7 @@ except ImportError:
 
 from .cli import cli_main
 from .helpers import ensure_eula_accepted
+from .utils import enable_duration_store
 
 
 def main() -> int:
@@ -20,6 +21,9 @@ def main() -> int:
     Main entry point for the application.
     Decides whether to run the GUI or CLI.
     """
+    # Remember probed durations between runs.
+    enable_duration_store()
+
     # Lightweight EULA check
     parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument("--accept-eula", action="store_true")
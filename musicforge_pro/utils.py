@@ -1,17 +1,49 @@
+import atexit
+import functools
 import subprocess
 import threading
 import os
+import queue
+import selectors
 import signal
+import struct
+import sys
 import time
 import json
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Any, Tuple, TYPE_CHECKING, Iterable
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Any,
+    Tuple,
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    Union,
+)
 
 if TYPE_CHECKING:
     from .core import ProcessingSettings, AudioFile
 
 AUDIO_EXTS = {".wav", ".mp3", ".flac", ".aac", ".m4a", ".ogg", ".opus", ".aiff", ".wma", ".mka"}
 LOG_FILE = Path.home() / ".musicforge_log.txt"
+DURATION_CACHE_FILE = Path.home() / ".musicforge" / "durations.json"
+_DURATION_CACHE_MAX = 4096
+_READ_SIZE = 65536
+_PIPE_SIZE = 1 << 20
+
+if os.name == "nt":
+    import ctypes
+
+    _GenerateConsoleCtrlEvent = ctypes.windll.kernel32.GenerateConsoleCtrlEvent
+    _GenerateConsoleCtrlEvent.argtypes = [ctypes.c_uint, ctypes.c_uint]
+    _CTRL_BREAK_EVENT = 1
+else:
+    _SIGINT = signal.SIGINT
+
 
 def run_ffmpeg(
     cmd: List[str],
@@ -19,115 +51,726 @@ def run_ffmpeg(
     duration_sec: float = 0.0,
     timeout: Optional[int] = None,
     stop_event: Optional[threading.Event] = None,
+    stdout_sink: Optional[Callable[[bytes], None]] = None,
+    stderr_sink: Optional[Callable[[bytes], None]] = None,
+    capture_stderr_tail: Optional[int] = 65536,
+    min_progress_interval_sec: float = 0.0,
 ) -> Tuple[int, str, str]:
     """
     Runs an FFmpeg command, captures its output, and reports progress.
 
     This function is an improved runner for FFmpeg processes that provides
     real-time progress reporting by parsing FFmpeg's progress output from stdout.
+    Pass an absolute executable path in `cmd[0]` when launching many
+    processes; on POSIX that allows the cheaper posix_spawn launch path.
 
     Args:
         cmd: The FFmpeg command to execute as a list of strings.
         on_progress: A callback function to report progress. It will be called
-            with keyword arguments parsed from FFmpeg's progress output
-            (e.g., frame, fps, bitrate, speed, out_time_ms, etc.), plus
-            'percent' and 'eta_sec' if they can be calculated.
+            once per FFmpeg progress block with the block's keys as keyword
+            arguments (e.g., frame, fps, bitrate, speed, out_time_us,
+            progress, etc.), plus 'percent' and 'eta_sec' if they can be
+            calculated. If set and `cmd` has no `-progress` option,
+            `-progress pipe:1 -nostats` is inserted before the output path.
         duration_sec: The total duration of the input file in seconds, used
-            to calculate the progress percentage and ETA.
-        timeout: An optional timeout for the process in seconds.
-        stop_event: An optional threading.Event to signal cancellation.
+            to calculate the progress percentage and ETA. If it is not given
+            and progress is requested, the duration of the single `-i`
+            input is looked up with `probe_duration`.
+        timeout: An optional timeout for the process in seconds. When it
+            expires the process is killed, its remaining output is drained,
+            and subprocess.TimeoutExpired is raised carrying that output.
+        stop_event: An optional threading.Event to signal cancellation. A
+            StopEvent is noticed as soon as it is set; a plain Event is
+            checked every 0.25 s.
+        stdout_sink: If given, receives raw stdout chunks as they arrive and
+            stdout is not kept in memory (an empty string is returned for it).
+        stderr_sink: Same as `stdout_sink`, for stderr.
+        capture_stderr_tail: Number of trailing stderr bytes to keep for the
+            return value; None keeps everything. Ignored when `stderr_sink`
+            is set.
+        min_progress_interval_sec: Progress blocks arriving sooner than this
+            after the last reported one are dropped. The final
+            `progress=end` block is always reported. The default of 0.0
+            reports every block.
 
     Returns:
         A tuple containing the return code, stdout, and stderr of the process.
     """
+    parse_progress = on_progress is not None
+    cmd, duration_sec = _prepare_command(cmd, parse_progress, duration_sec)
+    proc = _spawn(cmd)
+    assert proc.stdout is not None and proc.stderr is not None
+
+    stdout_chunks: List[bytes] = []
+    stderr_buf = bytearray()
+    feed = (
+        _progress_feeder(on_progress, duration_sec, min_progress_interval_sec)
+        if parse_progress
+        else None
+    )
+
+    stdout_fd = proc.stdout.fileno()
+    stderr_fd = proc.stderr.fileno()
+    rc: Optional[int] = None
+    deadline = time.monotonic() + timeout if timeout else None
+    timed_out = False
+    is_stopped = stop_event.is_set if stop_event else None
+    wake_fd = (
+        stop_event.fileno()
+        if isinstance(stop_event, StopEvent) and os.name != "nt"
+        else None
+    )
+    poll = os.name == "nt" or (stop_event is not None and wake_fd is None)
+    chunks = _pipe_chunks(
+        [stdout_fd, stderr_fd],
+        timeout=0.25 if poll else None,
+        wake_fd=wake_fd,
+        deadline=deadline,
+    )
+
+    for fd, chunk in chunks:
+        if is_stopped is not None and is_stopped():
+            _interrupt(proc)
+            rc = -1
+            break
+        if fd is None:
+            if deadline is not None and not timed_out and time.monotonic() >= deadline:
+                # Keep draining after the kill so the output up to this point
+                # is not lost.
+                proc.kill()
+                timed_out = True
+            continue
+        if fd == stderr_fd:
+            if stderr_sink is not None:
+                if chunk:
+                    stderr_sink(chunk)
+                continue
+            stderr_buf += chunk
+            if (
+                capture_stderr_tail is not None
+                and len(stderr_buf) > capture_stderr_tail
+            ):
+                del stderr_buf[:-capture_stderr_tail]
+            continue
+        if stdout_sink is None:
+            stdout_chunks.append(chunk)
+        elif chunk:
+            stdout_sink(chunk)
+        if feed is not None:
+            feed(chunk)
+
+    chunks.close()
+    proc.stdout.close()
+    proc.stderr.close()
+    if rc is None:
+        # The deadline was enforced above; this only reaps the process.
+        rc = proc.wait()
+
+    stdout, stderr = _decode(b"".join(stdout_chunks)), _decode(stderr_buf)
+    if timed_out:
+        raise subprocess.TimeoutExpired(cmd, timeout, output=stdout, stderr=stderr)
+    return rc, stdout, stderr
+
+
+def _prepare_command(
+    cmd: List[str], parse_progress: bool, duration_sec: float
+) -> Tuple[List[str], float]:
+    """Adds progress flags to `cmd` and looks up the input duration if needed."""
+    if parse_progress and "-progress" not in cmd:
+        cmd = [*cmd[:-1], "-progress", "pipe:1", "-nostats", cmd[-1]]
+    if parse_progress and duration_sec <= 0 and cmd.count("-i") == 1:
+        i = cmd.index("-i")
+        if i + 1 < len(cmd):
+            duration_sec = probe_duration(cmd[i + 1])
+    return cmd, duration_sec
+
+
+def _spawn(cmd: List[str]) -> subprocess.Popen:
+    """Starts FFmpeg with binary, unbuffered stdout/stderr pipes."""
     kwargs: Dict[str, Any] = {}
     if os.name == "nt":
         kwargs["creationflags"] = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+    else:
+        # Our own descriptors are non-inheritable (PEP 446), so there is nothing
+        # to close in the child. Together with an absolute cmd[0] this lets
+        # CPython launch via posix_spawn instead of fork+exec.
+        kwargs["close_fds"] = False
 
     proc = subprocess.Popen(
         cmd,
+        stdin=subprocess.DEVNULL,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
-        text=True,
-        bufsize=1,
-        universal_newlines=True,
+        bufsize=0,
         **kwargs,
     )
+    assert proc.stdout is not None and proc.stderr is not None
+    _grow_pipe(proc.stdout.fileno())
+    _grow_pipe(proc.stderr.fileno())
+    return proc
 
-    stdout_lines: List[str] = []
-    stderr_lines: List[str] = []
 
-    def read_stderr() -> None:
-        if proc.stderr:
-            for line in proc.stderr:
-                stderr_lines.append(line)
+def _progress_feeder(
+    emit: Callable[..., None], duration_sec: float, min_interval_sec: float
+) -> Callable[[bytes], None]:
+    """
+    Returns a function that takes raw `-progress` output chunks and calls
+    `emit` once per complete block. An empty chunk flushes a trailing line.
+    """
+    block: Dict[str, Any] = {}
+    duration_us = int(duration_sec * 1_000_000) if duration_sec > 0 else 0
+    percent_scale = 100.0 / duration_us if duration_us else 0.0
+    last_speed = 1.0
+    out_us: Optional[int] = None
+    last_emit = 0.0
+    pending = bytearray()
 
-    stderr_thread = threading.Thread(target=read_stderr, daemon=True)
-    stderr_thread.start()
+    def handle_line(line: str) -> None:
+        nonlocal last_speed, out_us, last_emit
+        key, sep, value = line.rstrip("\r\n").partition("=")
+        if not sep:
+            return
+        block[key] = value
 
-    while True:
-        if stop_event and stop_event.is_set():
+        if key == "out_time_us" or key == "out_time_ms":
+            # FFmpeg reports out_time_ms in microseconds as well.
             try:
-                if os.name == "nt":
-                    import ctypes
-                    ctypes.windll.kernel32.GenerateConsoleCtrlEvent(1, proc.pid)
-                    try:
-                        proc.wait(timeout=2)
-                    except subprocess.TimeoutExpired:
-                        proc.kill()
-                else:
-                    proc.send_signal(signal.SIGINT)
-            except Exception:
-                try:
-                    proc.terminate()
-                    proc.wait(timeout=1)
-                except Exception:
-                    proc.kill()
+                out_us = int(value)
+            except ValueError:
+                pass
+        elif key == "speed":
+            try:
+                last_speed = float(value.rstrip("x")) or last_speed
+            except ValueError:
+                pass
+        elif key == "progress":
+            if min_interval_sec > 0 and value != "end":
+                now = time.monotonic()
+                if now - last_emit < min_interval_sec:
+                    block.clear()
+                    out_us = None
+                    return
+                last_emit = now
+            if percent_scale and out_us is not None:
+                percent = out_us * percent_scale
+                block["percent"] = 100.0 if percent > 100.0 else percent
+                block["eta_sec"] = (duration_us - out_us) * 1e-6 / last_speed
+            emit(**block)
+            block.clear()
+            out_us = None
+
+    def feed(chunk: bytes) -> None:
+        if not chunk:
+            if pending:
+                handle_line(pending.decode("utf-8", "replace"))
+                pending.clear()
+            return
+        pending.extend(chunk)
+        # Walk complete lines in place and only decode key=value lines;
+        # consumed bytes are dropped with a single del afterwards.
+        find = pending.find
+        start = 0
+        with memoryview(pending) as view:
+            while True:
+                nl = find(b"\n", start)
+                if nl < 0:
+                    break
+                if find(b"=", start, nl) >= 0:
+                    handle_line(str(view[start:nl], "utf-8", "replace"))
+                start = nl + 1
+        del pending[:start]
+
+    return feed
+
+
+def probe_duration(path: str) -> float:
+    """
+    Returns the duration of a media file in seconds, or 0.0 if unknown.
+
+    WAV, FLAC, MP3 and Ogg files are measured from their headers; other
+    formats are probed with ffprobe. Results are cached per (path, mtime,
+    size) in memory, and in the file given to enable_duration_store if one
+    was, so each version of a file is probed only once.
+    """
+    path = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0.0
+    try:
+        return _probe_duration_cached(path, st.st_mtime_ns, st.st_size)
+    except _NoProber:
+        return 0.0
+
+
+class _NoProber(Exception):
+    """Raised out of the cache so an unknown duration is not remembered."""
+
+
+_duration_store_path: Optional[Path] = None
+_duration_store: Optional[Dict[str, float]] = None
+_duration_store_lock = threading.Lock()
+_duration_store_registered = False
+
+
+def enable_duration_store(path: Optional[Path] = DURATION_CACHE_FILE) -> None:
+    """
+    Keeps known durations in `path` between runs: it is read on first use
+    and written back at exit. Nothing is persisted until this is called;
+    None turns persistence off again.
+    """
+    global _duration_store_path, _duration_store, _duration_store_registered
+    with _duration_store_lock:
+        _duration_store_path = path
+        _duration_store = None
+        if path is not None and not _duration_store_registered:
+            atexit.register(_save_duration_store)
+            _duration_store_registered = True
+
+
+@functools.lru_cache(maxsize=_DURATION_CACHE_MAX)
+def _probe_duration_cached(path: str, mtime_ns: int, size: int) -> float:
+    from .core import FFMPEG
+
+    duration = _fast_duration(path)
+    if duration is not None:
+        return duration
+    key = f"{path}|{mtime_ns}|{size}"
+    with _duration_store_lock:
+        store = _load_duration_store()
+        if store is not None and key in store:
+            return store[key]
+    if not FFMPEG.ffprobe_path:
+        # Not cached: once ffprobe is installed the file is probed for real.
+        raise _NoProber(path)
+    duration = FFMPEG.probe_duration(path)
+    if duration > 0 and store is not None:
+        with _duration_store_lock:
+            store[key] = duration
+            if len(store) > _DURATION_CACHE_MAX:
+                del store[next(iter(store))]
+    return duration
+
+
+probe_duration.cache_clear = _probe_duration_cached.cache_clear  # type: ignore[attr-defined]
+
+
+def _load_duration_store() -> Optional[Dict[str, float]]:
+    """Returns the persistent store, reading it on first use; None if it is off."""
+    global _duration_store
+    if _duration_store_path is None:
+        return None
+    if _duration_store is None:
+        try:
+            with open(_duration_store_path, "r", encoding="utf-8") as f:
+                _duration_store = {k: float(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            _duration_store = {}
+    return _duration_store
+
+
+def _save_duration_store() -> None:
+    with _duration_store_lock:
+        path, store = _duration_store_path, _duration_store
+        if path is None or not store:
+            return
+        items = list(store.items())
+    # Entries for files that have since changed or gone can never be hit again.
+    current = [(key, value) for key, value in items if _duration_key_current(key)]
+    data = json.dumps(dict(current[-_DURATION_CACHE_MAX:])).encode("utf-8")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomic(path, data)
+    except OSError:
+        pass
+
+
+def _duration_key_current(key: str) -> bool:
+    try:
+        path, mtime_ns, size = key.rsplit("|", 2)
+        st = os.stat(path)
+        return st.st_mtime_ns == int(mtime_ns) and st.st_size == int(size)
+    except (OSError, ValueError):
+        return False
+
+
+def write_file_atomic(path: Union[str, Path], data: bytes) -> None:
+    """
+    Writes `data` to a temporary file next to `path`, flushes it to disk and
+    renames it over `path`, so readers see either the old or the new
+    contents. The temporary file is removed if anything fails.
+    """
+    tmp = f"{os.fspath(path)}.tmp"
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _fast_duration(path: str) -> Optional[float]:
+    """
+    Reads a file's duration from its WAV, FLAC, MP3 or Ogg headers without
+    starting ffprobe. Returns None for other formats or unusual files.
+    """
+    parser = _HEADER_PARSERS.get(os.path.splitext(path)[1].lower())
+    if parser is None:
+        return None
+    try:
+        with open(path, "rb") as f:
+            duration = parser(f)
+    except (OSError, ValueError, IndexError, struct.error, ZeroDivisionError):
+        return None
+    return duration if duration and duration > 0 else None
+
+
+def _wav_duration(f: BinaryIO) -> Optional[float]:
+    riff = f.read(12)
+    if riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        return None
+    byte_rate = 0
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        chunk_id, size = header[:4], struct.unpack("<I", header[4:])[0]
+        if chunk_id == b"fmt ":
+            fmt = f.read(size + (size & 1))
+            byte_rate = struct.unpack("<I", fmt[8:12])[0]
+        elif chunk_id == b"data":
+            # Streamed WAVs leave the size unset; let ffprobe handle those.
+            if not byte_rate or size in (0, 0xFFFFFFFF):
+                return None
+            return size / byte_rate
+        else:
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def _skip_id3v2(f: BinaryIO) -> int:
+    """Positions `f` after a leading ID3v2 tag and returns that offset."""
+    header = f.read(10)
+    offset = 0
+    if header[:3] == b"ID3" and len(header) == 10:
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        offset = 10 + size + (10 if header[5] & 0x10 else 0)
+    f.seek(offset)
+    return offset
+
+
+def _flac_duration(f: BinaryIO) -> Optional[float]:
+    _skip_id3v2(f)
+    head = f.read(4 + 4 + 34)
+    # STREAMINFO is always the first metadata block.
+    if head[:4] != b"fLaC" or head[4] & 0x7F != 0:
+        return None
+    bits = int.from_bytes(head[18:26], "big")
+    sample_rate = bits >> 44
+    total_samples = bits & ((1 << 36) - 1)
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
 
-            stderr_thread.join(timeout=1)
-            return -1, "".join(stdout_lines), "".join(stderr_lines)
 
-        if proc.stdout is None:
+_MP3_BITRATES = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+
+def _mp3_duration(f: BinaryIO) -> Optional[float]:
+    start = _skip_id3v2(f)
+    data = f.read(4096)
+    pos = data.find(b"\xff")
+    while 0 <= pos <= len(data) - 4:
+        b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+        version, layer = (b1 >> 3) & 3, (b1 >> 1) & 3
+        bitrate_idx, rate_idx = b2 >> 4, (b2 >> 2) & 3
+        if (
+            b1 & 0xE0 == 0xE0
+            and version != 1
+            and layer == 1  # Layer III
+            and 0 < bitrate_idx < 15
+            and rate_idx < 3
+        ):
             break
+        pos = data.find(b"\xff", pos + 1)
+    else:
+        return None
+
+    mpeg1 = version == 3
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_idx]
+    samples_per_frame = 1152 if mpeg1 else 576
+    mono = b3 >> 6 == 3
+    xing = pos + 4 + ((17 if mono else 32) if mpeg1 else (9 if mono else 17))
+    if data[xing : xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4 : xing + 8])[0]
+        if flags & 1:
+            frames = struct.unpack(">I", data[xing + 8 : xing + 12])[0]
+            return frames * samples_per_frame / sample_rate
+    vbri = pos + 4 + 32
+    if data[vbri : vbri + 4] == b"VBRI":
+        frames = struct.unpack(">I", data[vbri + 14 : vbri + 18])[0]
+        return frames * samples_per_frame / sample_rate
+
+    # No VBR header: estimate from the first frame's bitrate, as ffprobe does.
+    end = f.seek(0, os.SEEK_END)
+    f.seek(max(0, end - 128))
+    if f.read(3) == b"TAG":
+        end -= 128
+    bitrate = _MP3_BITRATES[3 if mpeg1 else 2][bitrate_idx] * 1000
+    return (end - start - pos) * 8 / bitrate
+
+
+def _ogg_duration(f: BinaryIO) -> Optional[float]:
+    page = f.read(27 + 255 + 19)
+    if page[:4] != b"OggS":
+        return None
+    packet = page[27 + page[26] :]
+    if packet[:7] == b"\x01vorbis":
+        sample_rate, pre_skip = struct.unpack("<I", packet[12:16])[0], 0
+    elif packet[:8] == b"OpusHead":
+        # Opus granule positions always count 48 kHz samples.
+        sample_rate, pre_skip = 48000, struct.unpack("<H", packet[10:12])[0]
+    else:
+        return None
+
+    end = f.seek(0, os.SEEK_END)
+    pos = end
+    while pos > 0:
+        pos = max(0, pos - _READ_SIZE)
+        f.seek(pos)
+        # Overlap by one page header so a header split across reads is found.
+        tail = f.read(_READ_SIZE + 27)
+        i = tail.rfind(b"OggS")
+        while i >= 0:
+            if i + 14 <= len(tail) and tail[i + 4] == 0:
+                granule = struct.unpack("<q", tail[i + 6 : i + 14])[0]
+                if granule > 0:
+                    return (granule - pre_skip) / sample_rate
+            i = tail.rfind(b"OggS", 0, i)
+    return None
+
+
+_HEADER_PARSERS: Dict[str, Callable[[BinaryIO], Optional[float]]] = {
+    ".wav": _wav_duration,
+    ".flac": _flac_duration,
+    ".mp3": _mp3_duration,
+    ".ogg": _ogg_duration,
+    ".oga": _ogg_duration,
+    ".opus": _ogg_duration,
+}
+
 
-        line = proc.stdout.readline()
-        if not line:
-            if proc.poll() is not None:
-                break
-            time.sleep(0.01)
+def prefetch_files(paths: Iterable[str]) -> None:
+    """
+    Asks the OS to start reading the given files into the page cache in the
+    background, so a later FFmpeg run finds its input already in memory.
+    Does nothing where posix_fadvise is unavailable (Windows, macOS).
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
             continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
 
-        stdout_lines.append(line)
-        line = line.strip()
 
-        if on_progress and "=" in line:
-            progress_data: Dict[str, Any] = {}
-            parts = line.split("=")
-            if len(parts) == 2:
-                key, value = parts[0].strip(), parts[1].strip()
-                progress_data[key] = value
+def _grow_pipe(fd: int) -> None:
+    """
+    Enlarges a pipe buffer to _PIPE_SIZE where supported (Linux), so FFmpeg
+    does not block writing startup diagnostics before we start reading.
+    """
+    try:
+        import fcntl
 
-                if key == "out_time_ms" and duration_sec > 0:
-                    try:
-                        out_ms = float(value)
-                        percent = min(100.0, (out_ms / 1_000_000.0) / duration_sec * 100.0)
-                        progress_data["percent"] = percent
+        fcntl.fcntl(fd, fcntl.F_SETPIPE_SZ, _PIPE_SIZE)
+    except (ImportError, AttributeError, OSError):
+        pass
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", "replace")
+
+
+def _pipe_chunks(
+    fds: List[int],
+    timeout: Optional[float],
+    wake_fd: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> Iterator[Tuple[Optional[int], bytes]]:
+    """
+    Yields (fd, chunk) pairs as data arrives on the given pipe descriptors.
+
+    An empty chunk marks EOF on that descriptor. (None, b"") is yielded whenever
+    `timeout` seconds pass without data, once when `wake_fd` becomes readable,
+    and once when the monotonic `deadline` passes, so the caller can check for
+    cancellation.
+    """
+    if os.name == "nt":
+        yield from _pipe_chunks_threaded(fds, timeout or 0.25)
+        return
+
+    with selectors.DefaultSelector() as sel:
+        for fd in fds:
+            os.set_blocking(fd, False)
+            sel.register(fd, selectors.EVENT_READ)
+        if wake_fd is not None:
+            sel.register(wake_fd, selectors.EVENT_READ)
+        remaining = len(fds)
+        while remaining:
+            wait = timeout
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    deadline = None
+                    yield None, b""
+                    continue
+                wait = left if wait is None else min(wait, left)
+            events = sel.select(wait)
+            if not events:
+                yield None, b""
+                continue
+            for key, _ in events:
+                if key.fd == wake_fd:
+                    sel.unregister(wake_fd)
+                    yield None, b""
+                    continue
+                data, eof = _read_available(key.fd)
+                if data:
+                    yield key.fd, data
+                if eof:
+                    sel.unregister(key.fd)
+                    remaining -= 1
+                    yield key.fd, b""
+
+
+def _read_available(fd: int) -> Tuple[bytes, bool]:
+    """Reads everything a non-blocking pipe has buffered; returns (data, eof)."""
+    parts: List[bytes] = []
+    while True:
+        try:
+            chunk = os.read(fd, _READ_SIZE)
+        except BlockingIOError:
+            return b"".join(parts), False
+        if not chunk:
+            return b"".join(parts), True
+        parts.append(chunk)
+
+
+class StopEvent(threading.Event):
+    """
+    A threading.Event that a selector can wait on as well: fileno() becomes
+    readable when the event is set and stays readable until clear(), so any
+    number of run_ffmpeg loops sharing the event wake up without polling.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._fd_lock = threading.Lock()
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+
+    def fileno(self) -> int:
+        return self._read_fd
 
-                        speed_str = progress_data.get("speed", "1.0").rstrip("x")
-                        speed = float(speed_str) if speed_str else 1.0
-                        if speed > 0:
-                            eta = (duration_sec - (out_ms / 1_000_000.0)) / speed
-                            progress_data["eta_sec"] = eta
-                    except (ValueError, ZeroDivisionError):
-                        pass
+    def set(self) -> None:
+        with self._fd_lock:
+            # The flag goes up first, so a woken loop always sees it set.
+            was_set = self.is_set()
+            super().set()
+            if not was_set:
+                os.write(self._write_fd, b"x")
 
-                if progress_data:
-                    on_progress(**progress_data)
+    def clear(self) -> None:
+        with self._fd_lock:
+            super().clear()
+            try:
+                os.read(self._read_fd, 1)
+            except BlockingIOError:
+                pass
+
+    def __del__(self) -> None:
+        # Only reached once no run_ffmpeg call holds the event any more.
+        for fd in (getattr(self, "_read_fd", None), getattr(self, "_write_fd", None)):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+
+def _pipe_chunks_threaded(
+    fds: List[int], timeout: float
+) -> Iterator[Tuple[Optional[int], bytes]]:
+    """Fallback for Windows, where select() does not support pipes."""
+    chunks: "queue.Queue[Tuple[int, bytes]]" = queue.Queue()
 
-    rc = proc.wait(timeout=timeout)
-    stderr_thread.join(timeout=1)
+    def reader(fd: int) -> None:
+        while True:
+            try:
+                chunk = os.read(fd, _READ_SIZE)
+            except OSError:
+                chunk = b""
+            chunks.put((fd, chunk))
+            if not chunk:
+                return
 
-    return rc, "".join(stdout_lines), "".join(stderr_lines)
+    for fd in fds:
+        threading.Thread(target=reader, args=(fd,), daemon=True).start()
+
+    remaining = len(fds)
+    while remaining:
+        try:
+            fd, chunk = chunks.get(timeout=timeout)
+        except queue.Empty:
+            yield None, b""
+            continue
+        if not chunk:
+            remaining -= 1
+        yield fd, chunk
+
+
+def _interrupt(proc: subprocess.Popen) -> None:
+    """Asks FFmpeg to stop gracefully, escalating to terminate/kill on failure."""
+    try:
+        if os.name == "nt":
+            _GenerateConsoleCtrlEvent(_CTRL_BREAK_EVENT, proc.pid)
+            try:
+                proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        else:
+            proc.send_signal(_SIGINT)
+    except Exception:
+        try:
+            proc.terminate()
+            proc.wait(timeout=1)
+        except Exception:
+            proc.kill()
 
 
 def validate_settings(s: "ProcessingSettings") -> None:
@@ -267,25 +910,198 @@ class SessionStore:
 
 
 class FolderWatcher(threading.Thread):
+    """
+    Reports new audio files under `path` to `callback`.
+
+    On Linux new files are delivered by inotify as soon as they are closed
+    after writing or moved into place. Elsewhere, or if inotify cannot be
+    set up, the folder is rescanned every `poll_interval` seconds.
+    """
+
     def __init__(self, path: Path, poll_interval: int, callback: Callable[[Iterable[str]], None]):
         super().__init__(daemon=True)
         self.path = path
         self.poll_interval = poll_interval
         self.callback = callback
-        self._stop_event = threading.Event()
-        self._known_files = set(self._scan())
+        self._stop_event = StopEvent()
+        self._inotify: Optional[_Inotify] = None
+        self._known_files: set[str] = set()
 
-    def _scan(self) -> set[str]:
-        return {str(p) for p in self.path.rglob("*") if p.suffix.lower() in AUDIO_EXTS}
+    def start(self) -> None:
+        # Opened here rather than in __init__ so a watcher that is never
+        # started holds no inotify descriptor. Watches are added before the
+        # initial scan so no file slips between.
+        self._inotify = _Inotify.open(self.path)
+        self._known_files = self._scan()
+        super().start()
+
+    def _scan(self, root: Optional[Path] = None) -> set[str]:
+        # Plain os.scandir walk: the polling loop rescans the whole tree every
+        # interval, and dirent types spare a Path object and a stat per entry.
+        found: set[str] = set()
+        stack = [os.fspath(root or self.path)]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif (
+                            os.path.splitext(entry.name)[1].lower() in AUDIO_EXTS
+                            and entry.is_file()
+                        ):
+                            found.add(entry.path)
+                    except OSError:
+                        continue
+        return found
 
     def run(self) -> None:
-        while not self._stop_event.is_set():
-            time.sleep(self.poll_interval)
+        if self._inotify is not None:
+            try:
+                self._run_inotify(self._inotify)
+                return
+            except OSError:
+                pass
+            finally:
+                self._inotify.close()
+        self._run_polling()
+
+    def _run_polling(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
             current_files = self._scan()
             new_files = current_files - self._known_files
+            # Replaced on every scan so deleted files are reported again if
+            # they come back.
+            self._known_files = current_files
             if new_files:
                 self.callback(sorted(list(new_files)))
-                self._known_files = current_files
+
+    def _run_inotify(self, inotify: "_Inotify") -> None:
+        with selectors.DefaultSelector() as sel:
+            sel.register(inotify.fd, selectors.EVENT_READ)
+            sel.register(self._stop_event.fileno(), selectors.EVENT_READ)
+            while not self._stop_event.is_set():
+                sel.select()
+                if self._stop_event.is_set():
+                    return
+                candidates: set[str] = set()
+                for path, is_dir, removed in inotify.read_changes():
+                    if path is None:
+                        # Event queue overflowed; fall back to a full rescan.
+                        scanned = self._scan()
+                        self._known_files &= scanned
+                        candidates |= scanned
+                    elif removed:
+                        # Forget deleted or moved-away entries so they are
+                        # reported again if they reappear.
+                        self._known_files.discard(path)
+                        if is_dir:
+                            prefix = path + os.sep
+                            self._known_files = {
+                                p for p in self._known_files if not p.startswith(prefix)
+                            }
+                    elif is_dir:
+                        inotify.add_tree(Path(path))
+                        candidates |= self._scan(Path(path))
+                    elif os.path.splitext(path)[1].lower() in AUDIO_EXTS:
+                        candidates.add(path)
+                new_files = candidates - self._known_files
+                if new_files:
+                    self._known_files |= new_files
+                    self.callback(sorted(new_files))
 
     def stop(self) -> None:
-        self._stop_event.set()
\ No newline at end of file
+        self._stop_event.set()
+
+
+class _Inotify:
+    """Minimal ctypes binding to Linux inotify for FolderWatcher."""
+
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_ONLYDIR = 0x01000000
+    _IN_ISDIR = 0x40000000
+    _IN_NONBLOCK = 0o4000
+    _IN_CLOEXEC = 0o2000000
+    _GONE = _IN_DELETE | _IN_MOVED_FROM
+    _MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _GONE | _IN_ONLYDIR
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, libc: Any, fd: int) -> None:
+        self._libc = libc
+        self.fd = fd
+        self._dirs: Dict[int, str] = {}
+
+    @classmethod
+    def open(cls, root: Path) -> Optional["_Inotify"]:
+        """Returns a watcher for `root` and its subfolders, or None if unsupported."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            import ctypes
+
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(cls._IN_NONBLOCK | cls._IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        inotify = cls(libc, fd)
+        try:
+            inotify.add_tree(root)
+        except OSError:
+            inotify.close()
+            return None
+        return inotify
+
+    def add_tree(self, root: Path) -> None:
+        for dirpath, _, _ in os.walk(root):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dirpath), self._MASK)
+            if wd < 0:
+                import ctypes
+
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed", dirpath)
+            self._dirs[wd] = dirpath
+
+    def read_changes(self) -> List[Tuple[Optional[str], bool, bool]]:
+        """
+        Returns (path, is_dir, removed) for each created, completed, deleted
+        or moved-away entry. A path of None means events were lost and the
+        caller should rescan.
+        """
+        data, _ = _read_available(self.fd)
+        changes: List[Tuple[Optional[str], bool, bool]] = []
+        offset = 0
+        size = self._EVENT.size
+        while offset + size <= len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            name = data[offset + size : offset + size + length].rstrip(b"\0")
+            offset += size + length
+            if mask & self._IN_Q_OVERFLOW:
+                changes.append((None, False, False))
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, os.fsdecode(name))
+            is_dir = bool(mask & self._IN_ISDIR)
+            if mask & self._GONE:
+                changes.append((path, is_dir, True))
+            # Files are reported once written; directories as soon as they appear.
+            elif is_dir or not mask & self._IN_CREATE:
+                changes.append((path, is_dir, False))
+        return changes
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
@@ -17,6 +17,14 @@ class TestCli(unittest.TestCase):
         self.assertEqual(args.input, "input")
         self.assertEqual(args.output, "output")
         self.assertEqual(args.fmt, "mp3")
+        # Unset, so a preset's worker count is not overridden.
+        self.assertIsNone(args.parallel)
+
+    def test_ffmpeg_threads_range(self):
+        parser = build_cli_parser()
+        self.assertEqual(parser.parse_args(["--ffmpeg-threads", "2"]).ffmpeg_threads, 2)
+        with patch("sys.stderr"), self.assertRaises(SystemExit):
+            parser.parse_args(["--ffmpeg-threads", "0"])
 
     def test_parse_kv_pairs(self):
         pairs = ["artist=Me", "title=My Song", "year=2023"]
@@ -0,0 +1,62 @@
+import unittest
+import os
+import sys
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from musicforge_pro.cookbook import (
+    cookbook_lines,
+    cookbook_params,
+    grouped_commands,
+    render_cookbook,
+)
+
+# The examples that docs/COOKBOOK.txt used to spell out verbatim.
+ORIGINAL = """FFmpeg Cookbook — 1200 Example Lines
+0001: ffmpeg -i in1.wav -af "highpass=f=90,lowpass=f=15500,dynaudnorm=f=1.5:p=0.9" -c:a pcm_s16le out1.wav
+0002: ffmpeg -i in2.wav -af "highpass=f=100,lowpass=f=15000,dynaudnorm=f=2.0:p=0.9" -c:a pcm_s16le out2.wav
+0003: ffmpeg -i in3.wav -af "highpass=f=110,lowpass=f=14500,dynaudnorm=f=1.0:p=0.9" -c:a pcm_s16le out3.wav
+0004: ffmpeg -i in4.wav -af "highpass=f=120,lowpass=f=14000,dynaudnorm=f=1.5:p=0.9" -c:a pcm_s16le out4.wav
+0005: ffmpeg -i in5.wav -af "highpass=f=130,lowpass=f=13500,dynaudnorm=f=2.0:p=0.9" -c:a pcm_s16le out5.wav
+""".splitlines()
+
+
+class TestCookbook(unittest.TestCase):
+    def test_matches_original_examples(self):
+        lines = render_cookbook().splitlines()
+        self.assertEqual(lines[: len(ORIGINAL)], ORIGINAL)
+        self.assertEqual(len(lines), 1201)
+        self.assertTrue(lines[-1].startswith("1200: ffmpeg -i in1200.wav "))
+
+    def test_render_is_cached(self):
+        self.assertIs(render_cookbook(), render_cookbook())
+
+    def test_line_count(self):
+        self.assertEqual(len(list(cookbook_lines(7))), 7)
+
+    def test_grouped_commands_cover_every_example_once(self):
+        commands = list(grouped_commands(500, max_inputs=2))
+        # 210 distinct chains; 500 examples hit each 2 or 3 times.
+        self.assertEqual(len(commands), 290)
+        outputs = [w for c in commands for w in c.split() if w.startswith("out")]
+        self.assertEqual(sorted(outputs), sorted(f"out{i}.wav" for i in range(1, 501)))
+        first = commands[0]
+        self.assertTrue(
+            first.startswith(
+                "ffmpeg -hide_banner -loglevel error -nostdin -i in1.wav -i in211.wav -map 0:a:0 "
+            )
+        )
+        self.assertEqual(
+            first.count("highpass=f=90,lowpass=f=15500,dynaudnorm=f=1.5:p=0.9"), 2
+        )
+
+    def test_params_window(self):
+        self.assertEqual(
+            list(cookbook_params(8, 10)),
+            [(8, 160, 15500, 2.0), (9, 170, 15000, 1.0)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@ from unittest.mock import patch, MagicMock
 import os
 import sys
 import subprocess
+import tempfile
 from pathlib import Path
 
 # Add the project root to the path to allow imports from musicforge_pro
@@ -14,6 +15,7 @@ from musicforge_pro.core import (
     ProcessingSettings,
     AudioFile,
     MetadataTemplate,
+    threads_per_invocation,
 )
 from musicforge_pro.utils import PresetManager
 
@@ -51,6 +53,34 @@ class TestFFmpegManager(unittest.TestCase):
             timeout=10,
         )
 
+    @patch("subprocess.run")
+    def test_env_override_wins_over_path(self, mock_run):
+        mock_run.return_value = subprocess.CompletedProcess(
+            args=[], returncode=0, stdout=""
+        )
+        with patch.dict(os.environ, {"MUSICFORGE_FFMPEG": sys.executable, "PATH": ""}):
+            manager = FFmpegManager()
+        self.assertEqual(manager.ffmpeg_path, str(Path(sys.executable).resolve()))
+        self.assertIsNone(manager.ffprobe_path)
+
+
+# Writes every output it is given, then fails grouped runs and inputs named
+# bad*; honours -n like FFmpeg does.
+FAKE_FFMPEG = """
+import os, sys
+args = sys.argv[1:]
+inputs = [args[i + 1] for i, a in enumerate(args) if a == "-i"]
+outputs = [a for i, a in enumerate(args) if a.endswith(".wav") and args[i - 1] != "-i"]
+if "-n" in args and any(os.path.exists(o) for o in outputs):
+    sys.exit("File exists. Exiting.")
+for o in outputs:
+    open(o, "w").close()
+if len(inputs) > 1:
+    sys.exit("grouped failure")
+if os.path.basename(inputs[0]).startswith("bad"):
+    sys.exit("bad input")
+"""
+
 
 class TestAudioProcessor(unittest.TestCase):
     def setUp(self):
@@ -71,6 +101,9 @@ class TestAudioProcessor(unittest.TestCase):
         )
         self.assertIn("-c:a", cmd)
         self.assertIn("pcm_s16le", cmd)
+        self.assertLess(cmd.index("-nostdin"), cmd.index("-i"))
+        self.assertEqual(cmd[cmd.index("-map") + 1], "0:a:0")
+        self.assertLess(cmd.index("-i"), cmd.index("-vn"))
 
     def test_build_command_normalize(self):
         settings = ProcessingSettings(
@@ -107,6 +140,117 @@ class TestAudioProcessor(unittest.TestCase):
         self.assertIn("artist=Test Artist", cmd)
         self.assertIn("title=Test Title", cmd)
 
+    def test_build_command_flac_compression_level(self):
+        settings = ProcessingSettings(output_format="flac", quality="0")
+        cmd = self.processor.build_command(
+            self.audio_file, settings, Path("/out/test.flac"), {"stem": "test"}
+        )
+        self.assertEqual(cmd[cmd.index("-compression_level") + 1], "0")
+        settings.quality = "V2"
+        cmd = self.processor.build_command(
+            self.audio_file, settings, Path("/out/test.flac"), {"stem": "test"}
+        )
+        self.assertNotIn("-compression_level", cmd)
+
+    def test_build_group_command(self):
+        settings = ProcessingSettings(output_format="wav")
+        other = AudioFile(path="/tmp/other.wav", name="other.wav", duration=5.0)
+        cmd = self.processor.build_group_command(
+            [
+                (self.audio_file, Path("/out/test.wav"), {"stem": "test"}, None),
+                (other, Path("/out/other.wav"), {"stem": "other"}, None),
+            ],
+            settings,
+        )
+        self.assertEqual(cmd.count("-i"), 2)
+        self.assertEqual(cmd.count("pcm_s16le"), 2)
+        first, second = cmd.index("0:a:0"), cmd.index("1:a:0")
+        self.assertLess(first, cmd.index("/out/test.wav"))
+        self.assertLess(cmd.index("/out/test.wav"), second)
+        self.assertEqual(cmd[-1], "/out/other.wav")
+        self.assertIn("title=other", cmd[second:])
+
+    def test_split_into_groups(self):
+        jobs = [
+            (AudioFile(path=f"/in/{i}.wav", name=f"{i}.wav"), Path(f"/out/{i}.wav"))
+            for i in range(5)
+        ]
+        groups = AudioProcessor.split_into_groups(jobs, max_inputs=2)
+        self.assertEqual([len(g) for g in groups], [2, 2, 1])
+        groups = AudioProcessor.split_into_groups(
+            jobs, max_inputs=32, max_arg_bytes=1200
+        )
+        self.assertEqual([len(g) for g in groups], [2, 2, 1])
+
+    @unittest.skipIf(os.name == "nt", "needs an executable script")
+    def test_failed_group_is_retried_per_file(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        fake = Path(tmp.name) / "ffmpeg"
+        fake.write_text(f"#!{sys.executable}\n{FAKE_FFMPEG}")
+        fake.chmod(0o755)
+        self.ffmpeg_manager.ffmpeg_path = str(fake)
+        settings = ProcessingSettings(
+            output_format="wav", normalize_loudness=True, normalize_mode="two-pass"
+        )
+        good = AudioFile(path="/tmp/good.wav", name="good.wav", duration=5.0)
+        bad = AudioFile(path="/tmp/bad.wav", name="bad.wav", duration=5.0)
+        out = Path(tmp.name)
+        with patch.object(
+            self.processor, "measure_loudness", return_value={"input_i": -20.0}
+        ) as measure:
+            results = self.processor.process_group(
+                [(good, out / "good_out.wav"), (bad, out / "bad_out.wav")], settings
+            )
+        self.assertEqual(
+            results,
+            [(True, None), (False, "bad input (grouped run: grouped failure)")],
+        )
+        # Loudness is measured once per file, not again for the retries.
+        self.assertEqual(measure.call_count, 2)
+
+    def test_script_command(self):
+        settings = ProcessingSettings(
+            output_format="wav", normalize_loudness=True, normalize_mode="two-pass"
+        )
+        other = AudioFile(path="/tmp/other.wav", name="other.wav", duration=5.0)
+        with patch.object(self.processor, "measure_loudness") as measure:
+            single = self.processor.script_command(
+                [(self.audio_file, Path("/out/test.wav"))], settings, threads_per_job=2
+            )
+            group = self.processor.script_command(
+                [
+                    (self.audio_file, Path("/out/test.wav")),
+                    (other, Path("/out/other.wav")),
+                ],
+                settings,
+                threads_per_job=2,
+            )
+        self.assertEqual(single.count("-i"), 1)
+        self.assertEqual(single[-1], "/out/test.wav")
+        self.assertEqual(group.count("-i"), 2)
+        for cmd in (single, group):
+            self.assertNotIn("-progress", cmd)
+            self.assertEqual(cmd[cmd.index("-threads") + 1], "2")
+            self.assertNotIn("measured_I", " ".join(cmd))
+        # Writing a script leaves the processor and the files untouched.
+        measure.assert_not_called()
+        self.assertEqual(self.processor.threads_per_job, 0)
+        self.assertIsNone(self.audio_file.measured_loudness)
+
+    @patch("os.cpu_count", return_value=16)
+    def test_threads_per_invocation(self, _):
+        with patch.dict(os.environ, {"MUSICFORGE_FFMPEG_THREADS": ""}):
+            self.assertEqual(threads_per_invocation(1), 0)
+            self.assertEqual(threads_per_invocation(4), 4)
+            self.assertEqual(threads_per_invocation(32), 1)
+            self.assertEqual(threads_per_invocation(4, requested=2), 2)
+        with patch.dict(os.environ, {"MUSICFORGE_FFMPEG_THREADS": "3"}):
+            self.assertEqual(threads_per_invocation(4), 3)
+            self.assertEqual(threads_per_invocation(4, requested=2), 2)
+        with patch.dict(os.environ, {"MUSICFORGE_FFMPEG_THREADS": "100"}):
+            self.assertEqual(threads_per_invocation(4), 4)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,229 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from musicforge_pro import utils
+from musicforge_pro.core import FFMPEG
+from musicforge_pro.utils import (
+    FolderWatcher,
+    StopEvent,
+    _fast_duration,
+    enable_duration_store,
+    prefetch_files,
+    probe_duration,
+    run_ffmpeg,
+)
+
+# Emits three FFmpeg-style progress blocks on stdout and a line on stderr.
+FAKE_FFMPEG = """
+import sys
+for us, state in ((2500000, "continue"), (5000000, "continue"), (10000000, "end")):
+    sys.stdout.write(f"frame=0\\nbitrate=N/A\\nout_time_us={us}\\nspeed=2.0x\\nprogress={state}\\n")
+    sys.stdout.flush()
+sys.stderr.write("done\\n")
+"""
+
+
+def fake_ffmpeg_cmd() -> list:
+    return [sys.executable, "-c", FAKE_FFMPEG, "-progress", "pipe:1"]
+
+
+class TestRunFFmpeg(unittest.TestCase):
+    def test_progress_reported_once_per_block(self):
+        blocks = []
+        rc, stdout, stderr = run_ffmpeg(
+            fake_ffmpeg_cmd(),
+            on_progress=lambda **kw: blocks.append(kw),
+            duration_sec=10.0,
+        )
+        self.assertEqual(rc, 0)
+        self.assertEqual(
+            [b["progress"] for b in blocks], ["continue", "continue", "end"]
+        )
+        self.assertAlmostEqual(blocks[0]["percent"], 25.0)
+        self.assertAlmostEqual(blocks[0]["eta_sec"], 3.75)
+        self.assertAlmostEqual(blocks[1]["percent"], 50.0)
+        self.assertAlmostEqual(blocks[2]["percent"], 100.0)
+        self.assertIn("progress=end", stdout)
+        self.assertEqual(stderr.strip(), "done")
+
+    def test_no_duration_skips_estimates(self):
+        blocks = []
+        run_ffmpeg(fake_ffmpeg_cmd(), on_progress=lambda **kw: blocks.append(kw))
+        self.assertEqual(len(blocks), 3)
+        self.assertNotIn("percent", blocks[0])
+
+    def test_min_interval_keeps_final_block(self):
+        blocks = []
+        run_ffmpeg(
+            fake_ffmpeg_cmd(),
+            on_progress=lambda **kw: blocks.append(kw),
+            min_progress_interval_sec=60.0,
+        )
+        self.assertEqual([b["progress"] for b in blocks], ["continue", "end"])
+
+    def test_sinks_bypass_capture(self):
+        out_chunks, err_chunks = [], []
+        rc, stdout, stderr = run_ffmpeg(
+            fake_ffmpeg_cmd(),
+            stdout_sink=out_chunks.append,
+            stderr_sink=err_chunks.append,
+        )
+        self.assertEqual(rc, 0)
+        self.assertEqual((stdout, stderr), ("", ""))
+        self.assertIn(b"progress=end", b"".join(out_chunks))
+        self.assertEqual(b"".join(err_chunks), b"done\n")
+
+    def test_timeout_kills_and_keeps_partial_output(self):
+        script = "import sys, time; print('started', file=sys.stderr, flush=True); time.sleep(30)"
+        slow = [sys.executable, "-c", script, "out"]
+        with self.assertRaises(subprocess.TimeoutExpired) as ctx:
+            run_ffmpeg(slow, timeout=0.5)
+        self.assertEqual(ctx.exception.stderr.strip(), "started")
+
+    def test_stop_event_wakes_the_loop(self):
+        stop = StopEvent()
+        threading.Timer(0.2, stop.set).start()
+        started = time.monotonic()
+        rc, _, _ = run_ffmpeg(
+            [sys.executable, "-c", "import time; time.sleep(30)"], stop_event=stop
+        )
+        self.assertEqual(rc, -1)
+        self.assertLess(time.monotonic() - started, 5)
+        stop.clear()
+        self.assertFalse(stop.is_set())
+
+
+class TestDurationStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = Path(self.tmp.name) / "durations.json"
+        enable_duration_store(self.store)
+        self.addCleanup(enable_duration_store, None)
+        utils._probe_duration_cached.cache_clear()
+        self.addCleanup(utils._probe_duration_cached.cache_clear)
+        self.media = os.path.join(self.tmp.name, "a.wma")
+        with open(self.media, "wb") as f:
+            f.write(b"\0" * 64)
+
+    def test_unknown_duration_not_cached_without_ffprobe(self):
+        with patch.object(FFMPEG, "ffprobe_path", None):
+            self.assertEqual(probe_duration(self.media), 0.0)
+        with patch.object(FFMPEG, "ffprobe_path", "ffprobe"), patch.object(
+            FFMPEG, "probe_duration", return_value=7.0
+        ):
+            self.assertEqual(probe_duration(self.media), 7.0)
+
+    def test_saved_without_stale_entries(self):
+        with patch.object(FFMPEG, "ffprobe_path", "ffprobe"), patch.object(
+            FFMPEG, "probe_duration", return_value=7.0
+        ):
+            probe_duration(self.media)
+        utils._load_duration_store()["/gone.wav|1|2"] = 3.0
+        utils._save_duration_store()
+        with open(self.store, encoding="utf-8") as f:
+            self.assertEqual(list(json.load(f).values()), [7.0])
+        self.assertFalse(os.path.exists(f"{self.store}.tmp"))
+
+
+class TestFastDuration(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_wav(self):
+        path = os.path.join(self.tmp.name, "a.wav")
+        with wave.open(path, "wb") as w:
+            w.setnchannels(2)
+            w.setsampwidth(2)
+            w.setframerate(44100)
+            w.writeframes(b"\0" * 4 * 44100 * 3)
+        self.assertAlmostEqual(_fast_duration(path), 3.0)
+
+    def test_flac_streaminfo(self):
+        path = os.path.join(self.tmp.name, "a.flac")
+        # sample rate, channels-1, bits-1, total samples
+        bits = (48000 << 44) | (1 << 41) | (15 << 36) | (48000 * 5)
+        streaminfo = b"\0" * 10 + bits.to_bytes(8, "big") + b"\0" * 16
+        with open(path, "wb") as f:
+            f.write(b"fLaC" + bytes([0x80, 0, 0, 34]) + streaminfo)
+        self.assertAlmostEqual(_fast_duration(path), 5.0)
+
+    def test_unknown_format(self):
+        path = os.path.join(self.tmp.name, "a.wma")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 64)
+        self.assertIsNone(_fast_duration(path))
+
+
+@unittest.skipUnless(hasattr(os, "posix_fadvise"), "posix_fadvise not available")
+class TestPrefetchFiles(unittest.TestCase):
+    def test_advises_existing_files_and_skips_missing(self):
+        with tempfile.NamedTemporaryFile() as f:
+            with patch("os.posix_fadvise") as fadvise:
+                prefetch_files([f.name, f.name + ".missing"])
+            self.assertEqual(fadvise.call_count, 1)
+            self.assertEqual(fadvise.call_args[0][3], os.POSIX_FADV_WILLNEED)
+
+
+class TestFolderWatcher(unittest.TestCase):
+    def test_reports_new_audio_files_only(self):
+        with tempfile.TemporaryDirectory() as root:
+            open(os.path.join(root, "old.wav"), "w").close()
+            found, seen = [], threading.Event()
+
+            def callback(paths):
+                found.extend(paths)
+                seen.set()
+
+            watcher = FolderWatcher(Path(root), 1, callback)
+            watcher.start()
+            self.addCleanup(watcher.stop)
+            os.makedirs(os.path.join(root, "sub"))
+            open(os.path.join(root, "notes.txt"), "w").close()
+            with open(os.path.join(root, "sub", "new.mp3"), "w") as f:
+                f.write("x")
+            self.assertTrue(seen.wait(5))
+            self.assertEqual(found, [os.path.join(root, "sub", "new.mp3")])
+
+    def test_recreated_file_is_reported_again(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "a.wav")
+            found, seen = [], threading.Semaphore(0)
+
+            def callback(paths):
+                found.extend(paths)
+                seen.release()
+
+            watcher = FolderWatcher(Path(root), 1, callback)
+            watcher.start()
+            self.addCleanup(watcher.stop)
+            open(path, "w").close()
+            self.assertTrue(seen.acquire(timeout=5))
+            os.remove(path)
+            # Let the removal be noticed (a poll cycle on the fallback backend).
+            threading.Event().wait(1.5)
+            open(path, "w").close()
+            self.assertTrue(seen.acquire(timeout=5))
+            self.assertEqual(found, [path, path])
+
+    def test_unstarted_watcher_holds_no_descriptor(self):
+        with tempfile.TemporaryDirectory() as root:
+            watcher = FolderWatcher(Path(root), 1, lambda paths: None)
+            self.assertIsNone(watcher._inotify)
+
+
+if __name__ == "__main__":
+    unittest.main()